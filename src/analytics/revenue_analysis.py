@@ -2,57 +2,101 @@
 Revenue Analysis for E-commerce Data
 This script calculates various revenue metrics from transaction data.
 """
+import os
+import pandas as pd
 from pyspark.sql import SparkSession
 from pyspark.sql.functions import sum, col, count, avg, when, date_format, to_date
+from pyspark.sql.types import (
+    StructType, StructField, StringType, IntegerType, DoubleType, TimestampNTZType
+)
 
-def calculate_revenue(spark, transactions_path):
+# Explicit transactions schema: avoids the extra inferSchema pass over CSV input.
+# Matches the types of the generated Parquet dataset (naive timestamps as NTZ)
+TRANSACTIONS_SCHEMA = StructType([
+    StructField("transaction_id", StringType()),
+    StructField("user_id", StringType()),
+    StructField("product_id", StringType()),
+    StructField("quantity", IntegerType()),
+    StructField("unit_price", DoubleType()),
+    StructField("amount", DoubleType()),
+    StructField("timestamp", TimestampNTZType()),
+    StructField("payment_method", StringType()),
+    StructField("status", StringType())
+])
+
+def calculate_revenue(spark, transactions_path, verbose=False):
     """
     Calculate total revenue and related metrics from transaction data
     
     Args:
         spark: SparkSession object
-        transactions_path: Path to the transactions CSV file
+        transactions_path: Path to the transactions Parquet dataset
+            (partitioned by status) or to a transactions CSV file
+        verbose: Print the schema and a data sample (runs an extra Spark job)
         
     Returns:
-        Dictionary containing revenue metrics
+        Dictionary containing revenue metrics (breakdowns as pandas DataFrames)
     """
     # Load transactions data
-    transactions_df = spark.read.format("csv").option("header", "true").option("inferSchema", "true").load(transactions_path)
+    if transactions_path.endswith(".csv"):
+        transactions_df = spark.read.format("csv") \
+                               .option("header", "true") \
+                               .option("mode", "DROPMALFORMED") \
+                               .schema(TRANSACTIONS_SCHEMA) \
+                               .load(transactions_path) \
+                               .withColumn("date", to_date("timestamp"))
+    else:
+        transactions_df = spark.read.parquet(transactions_path)
     
     # Display schema and sample data
-    print("Transactions Schema:")
-    transactions_df.printSchema()
-    print("\nSample Transactions Data:")
-    transactions_df.show(5)
+    if verbose:
+        print("Transactions Schema:")
+        transactions_df.printSchema()
+        print("\nSample Transactions Data:")
+        transactions_df.show(5)
+    
+    # Completed transactions are reused by the revenue breakdowns: cache them
+    # once so the source file is scanned and filtered a single time
+    completed_df = transactions_df.filter(col("status") == "completed").cache()
+    
+    # Aggregate every status in a single job: totals, counts and averages
+    # for all metrics below are derived from this one collected result
+    status_rows = transactions_df.groupBy("status") \
+                                 .agg(sum("amount").alias("total_amount"),
+                                      count("*").alias("count"),
+                                      avg("amount").alias("avg_amount")) \
+                                 .collect()
+    completed_row = next((row for row in status_rows if row["status"] == "completed"), None)
     
     # Calculate total revenue (only from completed transactions)
-    total_revenue = transactions_df.filter(col("status") == "completed") \
-                                  .agg(sum("amount").alias("total_revenue")) \
-                                  .collect()[0]["total_revenue"]
+    total_revenue = completed_row["total_amount"] if completed_row else None
+    
+    # Aggregated results are tiny (a few rows per key): collect them and sort
+    # in the driver rather than through a distributed orderBy shuffle
     
     # Calculate revenue by payment method
-    revenue_by_payment = transactions_df.filter(col("status") == "completed") \
-                                       .groupBy("payment_method") \
-                                       .agg(sum("amount").alias("revenue")) \
-                                       .orderBy(col("revenue").desc())
+    revenue_by_payment = completed_df.groupBy("payment_method") \
+                                     .agg(sum("amount").alias("revenue")) \
+                                     .toPandas() \
+                                     .sort_values("revenue", ascending=False, ignore_index=True)
     
     # Calculate revenue by day
-    daily_revenue = transactions_df.filter(col("status") == "completed") \
-                                  .withColumn("date", to_date("timestamp")) \
-                                  .groupBy("date") \
-                                  .agg(sum("amount").alias("daily_revenue")) \
-                                  .orderBy("date")
+    daily_revenue = completed_df.groupBy("date") \
+                                .agg(sum("amount").alias("daily_revenue")) \
+                                .toPandas() \
+                                .sort_values("date", ignore_index=True)
+    
+    # Every metric is now collected, release the cached subset
+    completed_df.unpersist()
     
     # Calculate average transaction value
-    avg_transaction_value = transactions_df.filter(col("status") == "completed") \
-                                          .agg(avg("amount").alias("avg_transaction_value")) \
-                                          .collect()[0]["avg_transaction_value"]
+    avg_transaction_value = completed_row["avg_amount"] if completed_row else None
     
     # Calculate transaction count by status
-    transaction_status_counts = transactions_df.groupBy("status") \
-                                              .agg(count("*").alias("count"), 
-                                                   sum("amount").alias("total_amount")) \
-                                              .orderBy(col("count").desc())
+    transaction_status_counts = pd.DataFrame(
+        [(row["status"], row["count"], row["total_amount"]) for row in status_rows],
+        columns=["status", "count", "total_amount"]
+    ).sort_values("count", ascending=False, ignore_index=True)
     
     # Return results
     return {
@@ -67,27 +111,37 @@ if __name__ == "__main__":
     # Initialize Spark session
     spark = SparkSession.builder \
         .appName("E-Commerce Revenue Analysis") \
+        .config("spark.sql.parquet.filterPushdown", "true") \
+        .config("spark.sql.csv.filterPushdown.enabled", "true") \
+        .config("spark.sql.adaptive.enabled", "true") \
+        .config("spark.sql.adaptive.coalescePartitions.enabled", "true") \
+        .config("spark.sql.shuffle.partitions", "8") \
+        .config("spark.sql.execution.arrow.pyspark.enabled", "true") \
+        .config("spark.sql.execution.arrow.maxRecordsPerBatch", "10000") \
         .getOrCreate()
     
     # Path to transactions data
-    transactions_path = "src/data_generation/data/raw/transactions.csv"
+    transactions_path = "src/data_generation/data/raw/transactions.parquet"
+    if not os.path.exists(transactions_path):
+        # Fall back to the committed sample CSV until the generator has been rerun
+        transactions_path = "src/data_generation/data/raw/transactions.csv"
     
     # Calculate revenue metrics
-    revenue_metrics = calculate_revenue(spark, transactions_path)
+    revenue_metrics = calculate_revenue(spark, transactions_path, verbose=True)
     
     # Display results
     print("\n=== REVENUE ANALYSIS ===")
     print(f"Total Revenue: ${revenue_metrics['total_revenue']:,.2f}")
     print("\nRevenue by Payment Method:")
-    revenue_metrics['revenue_by_payment'].show()
+    print(revenue_metrics['revenue_by_payment'].to_string(index=False))
     
     print("\nDaily Revenue:")
-    revenue_metrics['daily_revenue'].show(10)  # Show first 10 days
+    print(revenue_metrics['daily_revenue'].head(10).to_string(index=False))  # Show first 10 days
     
     print(f"\nAverage Transaction Value: ${revenue_metrics['avg_transaction_value']:,.2f}")
     
     print("\nTransaction Status Counts:")
-    revenue_metrics['transaction_status_counts'].show()
+    print(revenue_metrics['transaction_status_counts'].to_string(index=False))
     
     # Stop Spark session
     spark.stop()
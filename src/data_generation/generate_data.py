@@ -5,16 +5,44 @@ for E-commerce platform analysis.
 """
 # import necessary libraries
 import argparse
-import random
+import shutil
 from datetime import datetime, timedelta
 from faker import Faker
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pcsv
+import pyarrow.dataset as ds
 from pathlib import Path
 
 # Set random seed for reproducibility
 fake = Faker()
 Faker.seed(42)
-random.seed(42)
+rng = np.random.default_rng(42)
+
+# Arrow schema of the transactions Parquet dataset (status is a partition column).
+# Types mirror TRANSACTIONS_SCHEMA in revenue_analysis.py; timestamps are naive
+# wall-clock times, read by Spark as TIMESTAMP_NTZ
+TRANSACTIONS_ARROW_SCHEMA = pa.schema([
+    ("transaction_id", pa.string()),
+    ("user_id", pa.string()),
+    ("product_id", pa.string()),
+    ("quantity", pa.int32()),
+    ("unit_price", pa.float64()),
+    ("amount", pa.float64()),
+    ("timestamp", pa.timestamp("us")),
+    ("payment_method", pa.dictionary(pa.int8(), pa.string())),
+    ("status", pa.string()),
+    ("date", pa.date32())
+])
+
+
+def random_hex_ids(n, num_bytes=16):
+    """Generate n random hex identifiers of num_bytes each from the seeded RNG"""
+    width = num_bytes * 2
+    hex_str = rng.bytes(n * num_bytes).hex()
+    return [hex_str[i:i + width] for i in range(0, n * width, width)]
+
 
 # E-commerce Data Generator Class
 class EcommerceDataGenerator:
@@ -57,68 +85,63 @@ class EcommerceDataGenerator:
         
         # Actions
         self.actions = ["view", "click", "add_to_cart", "remove_from_cart", "search"]
+        self.action_probs = np.array([50, 30, 15, 3, 2]) / 100  # view is most common
         
         # Device types
         self.devices = ["Desktop", "Mobile", "Tablet"]
+        self.device_probs = np.array([40, 50, 10]) / 100  # mobile slightly more common
 
     # Generate product catalog
     def generate_products(self):
         """Generate product catalog"""
         print("Generating product catalog...")
         
-        products_data = []
-        for product_id in self.products:
-            category = random.choice(self.categories)
-            products_data.append({
-                "product_id": product_id,
-                "product_name": fake.catch_phrase(),
-                "category": random.choice(list(self.categories)),
-                "price": round(random.uniform(9.99, 999.99), 2),
-                "brand": random.choice(self.brands[category]),
-                "stock_quantity": random.randint(0, 1000),
-                "rating": round(random.uniform(1.0, 5.0), 1)
-            })
+        n = self.num_products
+        category_idx = rng.integers(0, len(self.categories), n)
+        categories = np.array(self.categories)[category_idx]
+        
+        # Brand is drawn from the product's own category (one row per category)
+        brand_table = np.array([self.brands[category] for category in self.categories])
+        brands = brand_table[category_idx, rng.integers(0, brand_table.shape[1], n)]
         
-        return pd.DataFrame(products_data)
+        return pd.DataFrame({
+            "product_id": self.products,
+            "product_name": [fake.catch_phrase() for _ in range(n)],
+            "category": pd.Categorical(categories, categories=self.categories),
+            "price": np.round(rng.uniform(9.99, 999.99, n), 2),
+            "brand": pd.Categorical(brands),
+            "stock_quantity": rng.integers(0, 1001, n),
+            "rating": np.round(rng.uniform(1.0, 5.0, n), 1)
+        })
     
     # Generate user navigation logs
-    def generate_user_logs(self, num_logs=10000, days=30):
+    def generate_user_logs(self, num_logs=10000, days=30, sessions_per_user=5):
         """Generate user navigation logs"""
         print(f"Generating {num_logs:,} user logs...")
         
-        logs_data = []
-        start_date = datetime.now() - timedelta(days=days)
+        start_date = np.datetime64(datetime.now() - timedelta(days=days))
         
-        for _ in range(num_logs):
-            user_id = random.choice(self.users)
-            timestamp = start_date + timedelta(
-                days=random.randint(0, days),
-                hours=random.randint(0, 23),
-                minutes=random.randint(0, 59),
-                seconds=random.randint(0, 59)
-            )
-            
-            # Generate session ID (users can have multiple sessions)
-            session_id = f"session_{fake.uuid4()[:8]}"
-            
-            logs_data.append({
-                "user_id": user_id,
-                "timestamp": timestamp,
-                "page_url": random.choice(self.pages),
-                "session_id": session_id,
-                "action": random.choices(
-                    self.actions, 
-                    weights=[50, 30, 15, 3, 2]  # view is most common
-                )[0],
-                "device_type": random.choices(
-                    self.devices,
-                    weights=[40, 50, 10]  # mobile slightly more common
-                )[0],
-                "duration_seconds": random.randint(5, 600)
-            })
+        # Random second offsets within the time window
+        offsets = rng.integers(0, days * 24 * 3600, num_logs, dtype=np.int64).astype("timedelta64[s]")
         
-        df = pd.DataFrame(logs_data)
-
+        # Each user owns a small pool of sessions; logs are spread across them
+        user_idx = rng.integers(0, self.num_users, num_logs)
+        session_idx = user_idx * sessions_per_user + rng.integers(0, sessions_per_user, num_logs)
+        session_pool = np.array([f"session_{i:08d}" for i in range(self.num_users * sessions_per_user)])
+        
+        df = pd.DataFrame({
+            "user_id": np.array(self.users)[user_idx],
+            "timestamp": pd.to_datetime(start_date + offsets),
+            "page_url": pd.Categorical(rng.choice(self.pages, num_logs), categories=self.pages),
+            "session_id": session_pool[session_idx],
+            "action": pd.Categorical(
+                rng.choice(self.actions, num_logs, p=self.action_probs), categories=self.actions
+            ),
+            "device_type": pd.Categorical(
+                rng.choice(self.devices, num_logs, p=self.device_probs), categories=self.devices
+            ),
+            "duration_seconds": rng.integers(5, 601, num_logs)
+        })
 
         # Sort by timestamp
         df = df.sort_values("timestamp").reset_index(drop=True)
@@ -126,53 +149,89 @@ class EcommerceDataGenerator:
     
     # Generate transaction data
     def generate_transactions(self, num_transactions=5000, days=30):
-        """Generate transaction data"""
+        """Generate transaction data (same rows and types as save_transactions writes)"""
+        table = pa.Table.from_batches(self.transaction_record_batches(num_transactions, days),
+                                      schema=TRANSACTIONS_ARROW_SCHEMA)
+        return table.to_pandas()
+    
+    # Generate transaction data as Arrow record batches
+    def transaction_record_batches(self, num_transactions=5000, days=30, batch_size=100_000):
+        """Generate transaction data as time-ordered RecordBatches of TRANSACTIONS_ARROW_SCHEMA"""
+        for batch_df in self.generate_transaction_batches(num_transactions, days, batch_size):
+            yield pa.RecordBatch.from_pandas(batch_df, schema=TRANSACTIONS_ARROW_SCHEMA,
+                                             preserve_index=False)
+    
+    # Generate transaction data batch by batch
+    def generate_transaction_batches(self, num_transactions=5000, days=30, batch_size=100_000):
+        """Generate transaction data as DataFrames of at most batch_size transactions"""
         print(f"Generating {num_transactions:,} transactions...")
         
-        transactions_data = []
-        start_date = datetime.now() - timedelta(days=days)
+        start_date = np.datetime64(datetime.now() - timedelta(days=days))
         
         # Select subset of users who actually purchase (not everyone buys)
-        purchasing_users = random.sample(self.users, int(self.num_users * 0.3))
+        purchasing_users = rng.choice(self.users, int(self.num_users * 0.3), replace=False)
         
-        for _ in range(num_transactions):
-            user_id = random.choice(purchasing_users)
-            timestamp = start_date + timedelta(
-                days=random.randint(0, days),
-                hours=random.randint(0, 23),
-                minutes=random.randint(0, 59)
-            )
-            
-            # Some users buy multiple items in one transaction
-            num_items = random.choices([1, 2, 3, 4, 5], weights=[50, 25, 15, 7, 3])[0]
-            
-            for _ in range(num_items):
-                product_id = random.choice(self.products)
-                quantity = random.choices([1, 2, 3], weights=[70, 20, 10])[0]
-                price = round(random.uniform(9.99, 999.99), 2)
-                
-                transactions_data.append({
-                    "transaction_id": fake.uuid4(),
-                    "user_id": user_id,
-                    "product_id": product_id,
-                    "quantity": quantity,
-                    "unit_price": price,
-                    "amount": round(price * quantity, 2),
-                    "timestamp": timestamp,
-                    "payment_method": random.choice(["credit_card", "paypal", "debit_card", "gift_card"]),
-                    "status": random.choices(
-                        ["completed", "pending", "cancelled", "refunded"],
-                        weights=[85, 8, 5, 2]
-                    )[0]
-                })
+        # Each batch covers its own consecutive slice of the time window, so
+        # the stream is time-ordered and Parquet date statistics stay selective
+        window_minutes = days * 24 * 60
+        for batch_start in range(0, num_transactions, batch_size):
+            num_batch = min(batch_size, num_transactions - batch_start)
+            start_minute = window_minutes * batch_start // num_transactions
+            end_minute = max(window_minutes * (batch_start + num_batch) // num_transactions,
+                             start_minute + 1)
+            yield self._generate_transaction_batch(num_batch, start_date, start_minute, end_minute,
+                                                   purchasing_users)
+    
+    def _generate_transaction_batch(self, num_transactions, start_date, start_minute, end_minute,
+                                    purchasing_users):
+        """Generate one batch of transactions, one row per purchased item, ordered by time"""
+        # Per-transaction fields
+        tx_users = rng.choice(purchasing_users, num_transactions)
+        tx_timestamps = start_date + np.sort(rng.integers(
+            start_minute, end_minute, num_transactions, dtype=np.int64
+        )).astype("timedelta64[m]")
         
-        df = pd.DataFrame(transactions_data)
-        df = df.sort_values("timestamp").reset_index(drop=True)
-        return df
+        # Some users buy multiple items in one transaction: expand each
+        # transaction to one row per item
+        num_items = rng.choice([1, 2, 3, 4, 5], num_transactions, p=[0.50, 0.25, 0.15, 0.07, 0.03])
+        tx_idx = np.repeat(np.arange(num_transactions), num_items)
+        total_rows = len(tx_idx)
+        
+        # Per-item fields
+        quantities = rng.choice([1, 2, 3], total_rows, p=[0.70, 0.20, 0.10])
+        prices = np.round(rng.uniform(9.99, 999.99, total_rows), 2)
+        
+        # Payment method is categorical (dictionary-encoded in Parquet); status
+        # stays a plain string as it becomes a partition directory
+        payment_methods = ["credit_card", "paypal", "debit_card", "gift_card"]
+        timestamps = pd.to_datetime(tx_timestamps[tx_idx])
+        
+        return pd.DataFrame({
+            "transaction_id": random_hex_ids(total_rows),
+            "user_id": tx_users[tx_idx],
+            "product_id": rng.choice(self.products, total_rows),
+            "quantity": quantities,
+            "unit_price": prices,
+            "amount": np.round(prices * quantities, 2),
+            "timestamp": timestamps,
+            "payment_method": pd.Categorical(
+                rng.choice(payment_methods, total_rows), categories=payment_methods
+            ),
+            "status": rng.choice(
+                ["completed", "pending", "cancelled", "refunded"], total_rows,
+                p=[0.85, 0.08, 0.05, 0.02]
+            ),
+            "date": timestamps.normalize()
+        })
     
-    # Save generated data to CSV
+    # Save generated data to CSV / Parquet
     def save_data(self, output_dir, num_logs, num_transactions):
-        """Generate and save all datasets"""
+        """
+        Generate and save all datasets
+        
+        Transactions are streamed to disk batch by batch and never held in
+        memory as a whole, so only their row count is returned.
+        """
         print(f"\n Starting data generation...")
         print(f"Configuration:")
         print(f"   - Users: {self.num_users:,}")
@@ -183,26 +242,68 @@ class EcommerceDataGenerator:
         Path(output_dir).mkdir(parents=True, exist_ok=True)
         products_df = self.generate_products()
         logs_df = self.generate_user_logs(num_logs)
-        transactions_df = self.generate_transactions(num_transactions)
         
-        # Save as CSV
+        # Save as CSV (transactions as columnar Parquet for Spark analytics)
         print(f"\n Saving data to {output_dir}/")
-        products_df.to_csv(f"{output_dir}/products.csv", index=False)
-        logs_df.to_csv(f"{output_dir}/user_logs.csv", index=False)
-        transactions_df.to_csv(f"{output_dir}/transactions.csv", index=False)
+        # Quote only fields that need it, matching the previous pandas output
+        csv_options = pcsv.WriteOptions(quoting_style="needed")
+        pcsv.write_csv(pa.Table.from_pandas(products_df, preserve_index=False),
+                       f"{output_dir}/products.csv", write_options=csv_options)
+        pcsv.write_csv(pa.Table.from_pandas(logs_df, preserve_index=False),
+                       f"{output_dir}/user_logs.csv", write_options=csv_options)
+        num_transaction_rows = self.save_transactions(f"{output_dir}/transactions.parquet",
+                                                      num_transactions)
         
         # Print summary
         print("\n Data generation complete!")
         print("\n Summary:")
         print(f"   - Products: {len(products_df):,} rows")
         print(f"   - User Logs: {len(logs_df):,} rows")
-        print(f"   - Transactions: {len(transactions_df):,} rows")
+        print(f"   - Transactions: {num_transaction_rows:,} rows")
         print(f"\n Files saved:")
         print(f"   - {output_dir}/products.csv")
         print(f"   - {output_dir}/user_logs.csv")
-        print(f"   - {output_dir}/transactions.csv")
+        print(f"   - {output_dir}/transactions.parquet")
         
-        return products_df, logs_df, transactions_df
+        return products_df, logs_df, num_transaction_rows
+    
+    # Stream transactions to a partitioned Parquet dataset
+    def save_transactions(self, path, num_transactions, batch_size=100_000):
+        """Generate and write transactions batch by batch, returning the row count"""
+        num_rows = 0
+        
+        def record_batches():
+            nonlocal num_rows
+            for batch in self.transaction_record_batches(num_transactions, batch_size=batch_size):
+                num_rows += batch.num_rows
+                yield batch
+        
+        # Clear any previous run: its files (older dates, statuses this run
+        # does not produce) would otherwise be read alongside the new data
+        shutil.rmtree(path, ignore_errors=True)
+        
+        # Partitioned by status only, so readers filtering on "completed" list
+        # and scan a single directory. date stays a regular column (a status x
+        # date layout would split even small runs into ~120 tiny files); since
+        # batches arrive in time order, its row-group min/max statistics let
+        # date-bounded queries skip row groups instead
+        ds.write_dataset(
+            record_batches(),
+            path,
+            schema=TRANSACTIONS_ARROW_SCHEMA,
+            format="parquet",
+            partitioning=["status"],
+            partitioning_flavor="hive",
+            existing_data_behavior="error",
+            file_options=ds.ParquetFileFormat().make_write_options(compression="snappy"),
+            # Batches are buffered per status partition until a full 128k-row
+            # group is ready: at most 4 x 128k rows in memory, independent of
+            # the total row count. Files roll over at 2M rows
+            min_rows_per_group=128_000,
+            max_rows_per_group=128_000,
+            max_rows_per_file=2_000_000
+        )
+        return num_rows
 
 
 def main():
@@ -247,13 +348,6 @@ def main():
     generator = EcommerceDataGenerator(num_users=args.users, num_products=args.products)
     generator.save_data(output_dir=args.output, num_logs=args.logs, num_transactions=args.transactions)
     
-    # Override default log/transaction counts if specified
-    #generator.generate_user_logs = lambda: generator._generate_user_logs(num_logs=args.logs)
-    generator.generate_transactions = lambda: generator.generate_transactions(num_transactions=args.transactions)
-    
-    #generator.save_data(output_dir=args.output)
-    logs_df = generator.generate_user_logs(num_logs=args.logs)
-    
     print("\n Ready to start PySpark analysis!")
 
 